@@ -1,131 +1,252 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import orjson
 import os
-from bs4 import BeautifulSoup
+from lxml import etree
 import re
 import argparse
+import gzip
+import hashlib
+import shelve
 from tqdm import tqdm
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
+from dataclasses import dataclass, field
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate
 
-def load_html_file(html_file):
-    """Load HTML file"""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        return f.read()
+# Title patterns, compiled once at import time
+# Matches "1.2.3", "1.2.3.4", "Article 1.2.3.4" and "Section 1.2.3" prefixes;
+# whichever group participates holds the article number
+_ARTICLE_NUM_RE = re.compile(
+    r'^(?:Article (\d+\.\d+\.\d+\.\d+)'
+    r'|Section (\d+\.\d+\.\d+(?:\.\d+)?)'
+    r'|(\d+\.\d+\.\d+(?:\.\d+)?))'
+)
+_ARTICLE_NUMBER_PATTERNS = [re.compile(p) for p in (
+    r'(\d+\.\d+\.\d+\.\d+)',  # Match 1.2.3.4 format
+    r'(\d+\.\d+\.\d+)',       # Match 1.2.3 format
+)]
+# Part 1 heading lines: "Section 1.x" or "1.x", with optional subsection and sub-subsection parts
+_LINE_RE = re.compile(r'^(?:Section 1\.|1\.\d+(?P<sub>\.\d+(?P<subsub>\.\d+)?)?\.?$)')
+_TITLE_RE = re.compile(r'^(\d+\.\d+(\.\d+)*\.?)\s+(.+)$')
+_LIST_RE = re.compile(r'^(\d+\)|\w+\))\s+(.+)$')
+_ABBREV_RE = re.compile(r'(e\.g\.|i\.e\.|etc\.)$')
+_SENTENCE_END = frozenset('.!?:;')
+# Fallbacks for API answers wrapped in explanatory text or a code fence
+_JSON_ARRAY_RE = re.compile(r'\[\s*\{.*\}\s*\]', re.DOTALL)
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\[.*?\])\s*```', re.DOTALL)
+# Enough trailing characters of a chunk to test for the longest abbreviation
+_TAIL_LENGTH = 8
+
+# Part 1 boundary markers, searched over all paragraphs joined one per line
+_PART1_MARKER_RE = re.compile(
+    r'(?P<division>^(?=.*Division B)(?=.*Part 1))'  # Division B and Part 1 in the same paragraph
+    r'|(?P<standalone>^Part 1\.?$|Part 1 General)',  # Standalone Part 1 marker
+    re.M
+)
+_PART1_NUMBERING_RE = re.compile(r'^1\.1(\.\d+)*\.?$|Section 1\.1', re.M)
+_PART1_END_RE = re.compile(r'Part 2|Division C|^2\.', re.M)
+_TERMS_RE = re.compile(r'Non-defined Terms|Defined Terms')
+_TERMS_TITLE_RE = re.compile(r'^1\.2\.1\.\d+\.?$')
+# Same markers as above, tested against one paragraph at a time
+_PART1_NUMBER_RE = re.compile(r'^1\.\d+(\.\d+)*\.?')
+_PART2_START_RE = re.compile(r'^2\.|Part 2|Division C')
+
+# Model used for paragraph merging
+_MODEL = "gpt-4o-mini"
+
+def _http_adapter(pool_size):
+    """HTTP adapter keeping up to pool_size keep-alive connections per host;
+    rate-limit and transient server errors are retried with exponential backoff"""
+    return HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["POST"])
+        )
+    )
+
+# Shared HTTP session so worker threads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', _http_adapter(16))
+
+@dataclass(slots=True)
+class Subsection:
+    """Subsection (e.g. 1.1.1) with its text blocks or merged paragraphs"""
+    title: str
+    number: str | None
+    content: list = field(default_factory=list)
+
+@dataclass(slots=True)
+class Section:
+    """Section (e.g. 1.1) with its own content and its subsections"""
+    title: str
+    number: str | None
+    subsections: list = field(default_factory=list)
+    content: list = field(default_factory=list)
+
+class RateLimiter:
+    """Space out API calls made from several threads to a maximum rate"""
+    
+    def __init__(self, requests_per_minute):
+        """Initialize rate limiter
+        
+        Args:
+            requests_per_minute: Maximum number of calls allowed per minute
+        """
+        self.interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def wait(self):
+        """Block until the caller is allowed to issue the next request"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def _match_article_number(text):
+    """Return the article number a title starts with, or None if text is not a title"""
+    match = _ARTICLE_NUM_RE.match(text)
+    if match:
+        return match.group(match.lastindex)
+    return None
 
 def is_article_number(text):
     """Check if text is an article number (e.g. 1.2.1.1, 1.2.3.4)"""
-    # Match title patterns consisting of numbers and dots
-    patterns = [
-        r'^(\d+\.\d+\.\d+\.\d+)(\.)?$',  # Match 1.2.3.4 or 1.2.3.4. format
-        r'^Article (\d+\.\d+\.\d+\.\d+)',  # Match Article 1.2.3.4 format
-        r'^Section (\d+\.\d+\.\d+)',      # Match Section 1.2.3 format
-        r'^(\d+\.\d+\.\d+\.\d+)(\.)?',    # Match 1.2.3.4 or 1.2.3.4. format, no space needed
-        r'^(\d+\.\d+\.\d+)(\.)?',         # Match 1.2.3 or 1.2.3. format, no space needed
-    ]
-    
-    for pattern in patterns:
-        if re.match(pattern, text):
-            return True
-    return False
+    return _match_article_number(text) is not None
 
 def extract_article_number(text):
     """Extract article number (e.g. '1.2.3.4') from text"""
-    patterns = [
-        r'(\d+\.\d+\.\d+\.\d+)',  # Match 1.2.3.4 format
-        r'(\d+\.\d+\.\d+)',       # Match 1.2.3 format
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
+    for pattern in _ARTICLE_NUMBER_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1)
     return None
 
+def _open_html(html_file):
+    """Open an HTML file for parsing as bytes, decompressing it if the path ends in .gz"""
+    if html_file.endswith(".gz"):
+        return gzip.open(html_file, 'rb')
+    return open(html_file, 'rb')
+
+def _parse_one_html(html_file):
+    """Extract the stripped text of every non-empty paragraph from one HTML file"""
+    print(f"Processing file: {html_file}")
+    paragraphs = []
+    
+    # gzip-compressed chunks from pdf_convert.py --compress are decompressed while streaming
+    with _open_html(html_file) as source:
+        # Stream <p> elements instead of building the whole document tree
+        for _, elem in etree.iterparse(source, events=("end",), tag="p", html=True, encoding="utf-8"):
+            text = "".join(elem.itertext()).strip()
+            if text:  # Skip empty paragraphs
+                paragraphs.append(text)
+            
+            # Free the paragraph and the already processed siblings before it
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    
+    return paragraphs
+
 def extract_content_from_html_files(html_files):
-    """Extract content from multiple HTML files"""
-    all_paragraphs = []
+    """Extract the stripped text of every non-empty paragraph from multiple HTML files"""
+    if len(html_files) == 1:
+        return _parse_one_html(html_files[0])
     
-    for html_file in html_files:
-        print(f"Processing file: {html_file}")
-        html_content = load_html_file(html_file)
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Get all paragraphs
-        paragraphs = soup.find_all('p')
-        
-        # Add to total list
-        all_paragraphs.extend(paragraphs)
+    # Parse files on separate cores; map keeps the input file order
+    with ProcessPoolExecutor(max_workers=min(len(html_files), os.cpu_count() or 1)) as executor:
+        results = list(executor.map(_parse_one_html, html_files))
     
-    return all_paragraphs
+    return [text for paragraphs in results for text in paragraphs]
+
+def _join_paragraphs(paragraphs):
+    """Join paragraph texts one per line so a multiline regex can scan them all at once
+    
+    Returns:
+        Tuple of (joined text, start offset of each paragraph in the joined text)
+    """
+    # Line breaks inside a paragraph become "\r": same length, so offsets stay valid, yet neither a
+    # line boundary for ^/$ nor a space, so markers split across lines still don't match
+    joined = "\n".join(text.replace("\n", "\r") for text in paragraphs)
+    offsets = list(accumulate((len(text) + 1 for text in paragraphs[:-1]), initial=0))
+    return joined, offsets
+
+def _find_paragraph(pattern, joined, offsets, start_index=0):
+    """Find the first paragraph at or after start_index that matches pattern
+    
+    Returns:
+        Tuple of (paragraph index, match object), or (None, None) if nothing matches
+    """
+    if start_index >= len(offsets):
+        return None, None
+    match = pattern.search(joined, offsets[start_index])
+    if match is None:
+        return None, None
+    return bisect_right(offsets, match.start()) - 1, match
 
 def find_part1_content(paragraphs):
-    """Find Part 1 content"""
+    """Find Part 1 content in a list of paragraph texts"""
     part1_content = []
     
+    # Scan all paragraphs with one compiled regex per marker instead of Python loops
+    joined, offsets = _join_paragraphs(paragraphs)
+    
     # Try multiple methods to find Part 1 content
-    # Method 1: Look for Division B and Part 1 markers
-    start_index = None
-    for i, p in enumerate(paragraphs):
-        text = p.get_text().strip()
-        
-        # Look for Division B marker followed by Part 1 marker
-        if "Division B" in text and "Part 1" in text:
-            start_index = i
-            print(f"Method 1: Found Division B and Part 1 marker: '{text}'")
-            break
-        
-        # Look for standalone Part 1 marker
-        if text.strip() == "Part 1" or text.strip() == "Part 1." or "Part 1 General" in text:
-            start_index = i
-            print(f"Method 1: Found standalone Part 1 marker: '{text}'")
-            break
+    # Method 1: Look for Division B and Part 1 markers, or a standalone Part 1 marker
+    start_index, match = _find_paragraph(_PART1_MARKER_RE, joined, offsets)
+    if match is not None:
+        if match.group("division") is not None:
+            print(f"Method 1: Found Division B and Part 1 marker: '{paragraphs[start_index]}'")
+        else:
+            print(f"Method 1: Found standalone Part 1 marker: '{paragraphs[start_index]}'")
     
-    # Method 2: Look for titles starting with "1.1"
+    # Method 2: Look for titles starting with "1.1" (1.1.1.1 format or Section 1.1.1 format)
     if start_index is None:
-        for i, p in enumerate(paragraphs):
-            text = p.get_text().strip()
-            
-            # Look for 1.1.1.1 format or Section 1.1.1 format
-            if re.match(r'^1\.1(\.\d+)*\.?$', text) or "Section 1.1" in text:
-                start_index = i
-                print(f"Method 2: Found Part 1 numbering marker: '{text}'")
-                break
+        start_index, match = _find_paragraph(_PART1_NUMBERING_RE, joined, offsets)
+        if match is not None:
+            print(f"Method 2: Found Part 1 numbering marker: '{paragraphs[start_index]}'")
     
     # Method 3: Look for specific titles like "Non-defined Terms" or "Defined Terms"
     if start_index is None:
-        for i, p in enumerate(paragraphs):
-            text = p.get_text().strip()
+        last_i = None
+        for match in _TERMS_RE.finditer(joined):
+            i = bisect_right(offsets, match.start()) - 1
+            if i == last_i:
+                continue  # Both keywords in the same paragraph
+            last_i = i
             
-            if "Non-defined Terms" in text or "Defined Terms" in text:
-                # Look back a few elements to find a suitable starting point
-                for j in range(max(0, i-10), i):
-                    prev_text = paragraphs[j].get_text().strip()
-                    if re.match(r'^1\.2\.1\.\d+\.?$', prev_text):
-                        start_index = j
-                        print(f"Method 3: Found title marker near 'Terms': '{prev_text}'")
-                        break
-                if start_index:
+            # Look back a few elements to find a suitable starting point
+            for j in range(max(0, i-10), i):
+                prev_text = paragraphs[j]
+                if _TERMS_TITLE_RE.match(prev_text):
+                    start_index = j
+                    print(f"Method 3: Found title marker near 'Terms': '{prev_text}'")
                     break
+            if start_index:
+                break
     
     # If all methods fail, try to extract content from the beginning of the file
     if start_index is None:
         print("Warning: Could not find clear start of Part 1, will start from beginning of document")
         start_index = 0
     
-    # Determine content end position
-    end_index = None
-    
-    # Look for Part 2 or Division C marker
-    for i in range(start_index + 1, len(paragraphs)):
-        text = paragraphs[i].get_text().strip()
-        
-        if "Part 2" in text or "Division C" in text or text.startswith("2."):
-            end_index = i
-            print(f"Found Part 1 end marker: '{text}'")
-            break
+    # Determine content end position: look for Part 2 or Division C marker
+    end_index, match = _find_paragraph(_PART1_END_RE, joined, offsets, start_index + 1)
+    if match is not None:
+        print(f"Found Part 1 end marker: '{paragraphs[end_index]}'")
     
     # If no end marker is found, use the rest of the document
     if end_index is None:
@@ -135,8 +256,7 @@ def find_part1_content(paragraphs):
         part1_paragraphs = paragraphs[start_index:end_index]
     
     # Extract text content
-    for p in part1_paragraphs:
-        text = p.get_text().strip()
+    for text in part1_paragraphs:
         if text:  # Skip empty text
             part1_content.append(text)
     
@@ -150,17 +270,15 @@ def find_part1_content(paragraphs):
         alternative_content = []
         in_part1 = False
         
-        for p in paragraphs:
-            text = p.get_text().strip()
-            
+        for text in paragraphs:
             # Check if this is Part 1 content
-            if re.match(r'^1\.\d+(\.\d+)*\.?', text) or (in_part1 and not text.startswith("2.")):
+            if _PART1_NUMBER_RE.match(text) or (in_part1 and not text.startswith("2.")):
                 in_part1 = True
                 if text:  # Skip empty text
                     alternative_content.append(text)
             
             # Check if we've left Part 1 area
-            if in_part1 and (text.startswith("2.") or "Part 2" in text or "Division C" in text):
+            if in_part1 and _PART2_START_RE.search(text):
                 in_part1 = False
         
         # If alternative method extracted more content, use it
@@ -170,17 +288,10 @@ def find_part1_content(paragraphs):
     
     return part1_content
 
-def call_gpt4o_mini(text_chunks, api_key):
-    """Call GPT-4o-mini API to identify paragraphs"""
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
-    prompt = f"""
-You are a paragraph restructuring expert. The following are text fragments from a PDF converted to HTML, where each line has been split into separate blocks due to PDF conversion issues.
-Please analyze these text fragments and determine which ones should be merged into single paragraphs.
+# Instructions shared by every request; kept byte-identical across calls so the
+# provider's automatic prefix caching can serve it from cache
+_SYSTEM_PROMPT = """You are a paragraph restructuring expert. You will receive batches of text fragments from a PDF converted to HTML, where each line has been split into separate blocks due to PDF conversion issues.
+For each batch, analyze its text fragments and determine which ones should be merged into single paragraphs. Batches are independent: never merge blocks from different batches.
 
 **Important rules:**
 1. For title patterns like "1.2.3.4", "Article 1.2.3.4", "Section 1.2.3", these are standalone titles and should be separate paragraphs.
@@ -189,67 +300,144 @@ Please analyze these text fragments and determine which ones should be merged in
 4. Even within the same batch, if text blocks belong to different titles (e.g., 1.2.2.1 and 1.2.2.2), they should not be merged.
 5. For numbered paragraphs (like 1), 2), a), b), etc.), each numbered item should be a separate paragraph, but their content may span multiple lines that need to be merged.
 
-Return a standard JSON array where each element represents a paragraph, in the format:
+Return a standard JSON array with one element per batch, in the format:
 [
-  {{
-    "paragraph_index": 0,
-    "chunk_indices": [0, 1, 2]  // This indicates that text blocks 0, 1, and 2 should be merged into a single paragraph
-  }},
+  {
+    "batch_id": 0,
+    "paragraphs": [
+      {
+        "paragraph_index": 0,
+        "chunk_indices": [0, 1, 2]  // This indicates that text blocks 0, 1, and 2 of batch 0 should be merged into a single paragraph
+      },
+      ...
+    ]
+  },
   ...
 ]
 
-Ensure your response can be parsed directly by json.loads() without any explanatory text or formatting characters. Return only the JSON array.
+Ensure your response can be parsed directly by json.loads() without any explanatory text or formatting characters. Return only the JSON array. Remember, content under different title numbers (like 1.2.2.1 and 1.2.2.2) must be processed separately and not merged into the same paragraph."""
+
+def _fallback_structure(text_chunks):
+    """Simple merge strategy used when the API gives no usable answer: merge all blocks into one paragraph"""
+    return [{"paragraph_index": 0, "chunk_indices": list(range(len(text_chunks)))}]
 
-Here are the text blocks to analyze:
-{json.dumps(text_chunks, ensure_ascii=False)}
+def _batch_cache_key(text_chunks):
+    """Cache key for a batch: depends on the model, the instructions and the text blocks"""
+    fingerprint = orjson.dumps([_MODEL, _SYSTEM_PROMPT, text_chunks], option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(fingerprint).hexdigest()
+
+def _unpack_batch_results(results, batches):
+    """Map per-batch answers from the API back onto the submitted batches
+    
+    Returns:
+        List with one paragraph structure per batch, None where the answer is missing or invalid
+    """
+    structures = [None] * len(batches)
+    
+    def valid_index(idx, size):
+        # Negative indices would silently address blocks from the end
+        return isinstance(idx, int) and not isinstance(idx, bool) and 0 <= idx < size
+    
+    for item in results:
+        try:
+            batch_id = item["batch_id"]
+            if not valid_index(batch_id, len(batches)):
+                continue
+            batch = batches[batch_id]
+            # Make sure every referenced block exists before accepting the answer
+            if not all(valid_index(idx, len(batch))
+                       for paragraph in item["paragraphs"] for idx in paragraph["chunk_indices"]):
+                continue
+        except (KeyError, TypeError):
+            continue
+        structures[batch_id] = item["paragraphs"]
+    
+    return structures
+
+def call_gpt4o_mini(batches, api_key, rate_limiter=None):
+    """Call GPT-4o-mini API to identify paragraphs
+    
+    Several independent batches of text blocks are sent in one request, so the
+    instruction prefix is paid for once per request rather than once per batch.
+    
+    Args:
+        batches: List of text block lists
+        api_key: OpenAI API key
+        rate_limiter: Optional RateLimiter shared between threads
+        
+    Returns:
+        List with one paragraph structure per batch, None where the API gave no usable answer
+    """
+    url = "https://api.openai.com/v1/chat/completions"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    
+    payload = [{"batch_id": i, "chunks": batch} for i, batch in enumerate(batches)]
+    prompt = f"""Here are the batches of text blocks to analyze:
+{orjson.dumps(payload).decode('utf-8')}
 """
 
     data = {
-        "model": "gpt-4o-mini",
+        "model": _MODEL,
         "messages": [
-            {"role": "system", "content": "You are a professional text analysis assistant responsible for identifying text paragraph structure. Return only a valid JSON array without any explanatory text. Remember, content under different title numbers (like 1.2.2.1 and 1.2.2.2) must be processed separately and not merged into the same paragraph."},
+            {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.3
     }
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        response = _SESSION.post(url, headers=headers, json=data, timeout=60)
         response.raise_for_status()
-        result = response.json()
+        result = orjson.loads(response.content)
         content = result['choices'][0]['message']['content']
         
         # Try to extract JSON part (if API returned extra explanatory text)
         try:
             # Try direct parsing
-            return json.loads(content)
-        except json.JSONDecodeError:
+            return _unpack_batch_results(orjson.loads(content), batches)
+        except orjson.JSONDecodeError:
             # If direct parsing fails, try to extract JSON part from content
-            import re
-            json_match = re.search(r'\[\s*\{.*\}\s*\]', content, re.DOTALL)
+            json_match = _JSON_ARRAY_RE.search(content)
             if json_match:
-                json_str = json_match.group(0)
-                return json.loads(json_str)
+                try:
+                    return _unpack_batch_results(orjson.loads(json_match.group(0)), batches)
+                except orjson.JSONDecodeError:
+                    pass
             
             # Try to extract part marked with ```json and ``` tags
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
+            json_match = _JSON_FENCE_RE.search(content)
             if json_match:
-                json_str = json_match.group(1)
-                return json.loads(json_str)
+                return _unpack_batch_results(orjson.loads(json_match.group(1)), batches)
             
             # All attempts failed, print detailed error info
             print(f"Could not parse API returned JSON: {content}")
-            
-            # If parsing fails, return a simple merge strategy: merge all blocks into one paragraph
-            return [{"paragraph_index": 0, "chunk_indices": list(range(len(text_chunks)))}]
+            return [None] * len(batches)
             
     except Exception as e:
         print(f"API call error: {e}")
         if 'response' in locals():
             print(f"API response: {response.text}")
         
-        # If API call fails, return a simple merge strategy: merge all blocks into one paragraph
-        return [{"paragraph_index": 0, "chunk_indices": list(range(len(text_chunks)))}]
+        return [None] * len(batches)
+
+# Line kinds produced by _classify_line
+_PLAIN, _SECTION, _SUBSECTION, _SUBSUBSECTION = range(4)
+
+def _classify_line(line):
+    """Classify a content line as a section, subsection, sub-subsection title or regular content"""
+    match = _LINE_RE.match(line)
+    if match is None:
+        return _PLAIN
+    if match.group("subsub") is not None:
+        return _SUBSUBSECTION
+    if match.group("sub") is not None:
+        return _SUBSECTION
+    return _SECTION
 
 def process_content(content):
     """Process content to identify sections and subsections"""
@@ -258,45 +446,43 @@ def process_content(content):
     current_subsection = None
     current_text = []
     
-    for line in content:
+    # Classify every line up front so the loop below only dispatches on the kind
+    kinds = [_classify_line(line) for line in content]
+    
+    for line, kind in zip(content, kinds):
         # Check if this is a section title (e.g., "1.1")
-        if re.match(r'^1\.\d+\.?$', line) or line.startswith("Section 1."):
+        if kind == _SECTION:
             # Save previous section if exists
             if current_section is not None:
                 # Add remaining text to the current subsection
                 if current_text:
                     if current_subsection is None:
                         # If no subsection exists, add text directly to section
-                        sections[-1]["content"].extend(current_text)
+                        sections[-1].content.extend(current_text)
                     else:
                         # Add text to the current subsection
-                        sections[-1]["subsections"][-1]["content"].extend(current_text)
+                        sections[-1].subsections[-1].content.extend(current_text)
                     current_text = []
             
             # Extract section number
             section_number = extract_article_number(line)
             
             # Create new section
-            current_section = {
-                "title": line,
-                "number": section_number,
-                "subsections": [],
-                "content": []
-            }
+            current_section = Section(line, section_number)
             sections.append(current_section)
             current_subsection = None
             
         # Check if this is a subsection title (e.g., "1.1.1")
-        elif re.match(r'^1\.\d+\.\d+\.?$', line):
+        elif kind == _SUBSECTION:
             # Add remaining text to the previous subsection if exists
             if current_text:
                 if current_subsection is None:
                     # If no subsection exists, add text directly to section
                     if current_section is not None:
-                        current_section["content"].extend(current_text)
+                        current_section.content.extend(current_text)
                 else:
                     # Add text to the current subsection
-                    current_section["subsections"][-1]["content"].extend(current_text)
+                    current_section.subsections[-1].content.extend(current_text)
                 current_text = []
             
             # Extract subsection number
@@ -304,31 +490,27 @@ def process_content(content):
             
             # Create new subsection
             if current_section is not None:
-                current_subsection = {
-                    "title": line,
-                    "number": subsection_number,
-                    "content": []
-                }
-                current_section["subsections"].append(current_subsection)
+                current_subsection = Subsection(line, subsection_number)
+                current_section.subsections.append(current_subsection)
             
         # Check if this is a sub-subsection title (e.g., "1.1.1.1")
-        elif re.match(r'^1\.\d+\.\d+\.\d+\.?$', line):
+        elif kind == _SUBSUBSECTION:
             # Add remaining text to the previous section/subsection
             if current_text:
                 if current_subsection is None:
                     # If no subsection exists, add text directly to section
                     if current_section is not None:
-                        current_section["content"].extend(current_text)
+                        current_section.content.extend(current_text)
                 else:
                     # Add text to the current subsection
-                    current_section["subsections"][-1]["content"].extend(current_text)
+                    current_section.subsections[-1].content.extend(current_text)
                 current_text = []
             
             # For sub-subsections, we'll add them as content to the parent subsection
             if current_subsection is not None:
-                current_subsection["content"].append(line)
+                current_subsection.content.append(line)
             elif current_section is not None:
-                current_section["content"].append(line)
+                current_section.content.append(line)
             
         # Regular content
         else:
@@ -339,99 +521,171 @@ def process_content(content):
         if current_subsection is None:
             # If no subsection exists, add text directly to section
             if current_section is not None:
-                current_section["content"].extend(current_text)
+                current_section.content.extend(current_text)
         else:
             # Add text to the current subsection
-            current_section["subsections"][-1]["content"].extend(current_text)
+            current_section.subsections[-1].content.extend(current_text)
     
     return sections
 
-def merge_paragraphs_in_sections(sections, api_key, batch_size=15):
-    """Merge paragraphs within sections using GPT API"""
+def _split_batches(content, batch_size):
+    """Split a content list into batches of at most batch_size text blocks"""
+    return [content[i:i+batch_size] for i in range(0, len(content), batch_size)]
+
+def _join_chunks(chunks):
+    """Join text blocks into one paragraph, skipping the join for the common single-block case"""
+    if len(chunks) == 1:
+        return chunks[0]
+    return " ".join(chunks)
+
+def _merge_batch(batch, paragraph_structure):
+    """Join the text blocks of a batch into paragraphs as described by a paragraph structure"""
+    return [_join_chunks([batch[idx] for idx in paragraph["chunk_indices"]])
+            for paragraph in paragraph_structure]
+
+def merge_paragraphs_in_sections(sections, api_key, batch_size=15, batches_per_request=8,
+                                 max_workers=8, requests_per_minute=500, cache_path=".gpt_cache"):
+    """Merge paragraphs within sections using GPT API
+    
+    All batches of every section and subsection are collected first. Batches
+    without ambiguous boundaries are merged locally by auto_merge_text_chunks,
+    batches already answered in an earlier run are read from the on-disk
+    cache, and the rest are packed several to a request. The API calls are
+    spread over a thread pool and the results are put back in document order.
+    
+    Args:
+        cache_path: Path of the shelve cache of API answers, None to disable caching
+    """
     merged_sections = []
+    # Each job is (content list to fill, batch of text blocks)
+    jobs = []
     
     for section in sections:
         # Create a copy of the section
-        merged_section = {
-            "title": section["title"],
-            "number": section["number"],
-            "subsections": [],
-            "content": []
-        }
+        merged_section = Section(section.title, section.number)
         
-        # Merge content in the main section
-        if section["content"]:
-            # Split content into batches to avoid API limits
-            for i in range(0, len(section["content"]), batch_size):
-                batch = section["content"][i:i+batch_size]
-                
-                # Call API to get paragraph structure
-                paragraph_structure = call_gpt4o_mini(batch, api_key)
-                
-                # Merge paragraphs according to API response
-                for paragraph in paragraph_structure:
-                    merged_paragraph = " ".join([batch[idx] for idx in paragraph["chunk_indices"]])
-                    merged_section["content"].append(merged_paragraph)
-                
-                # Add delay to avoid rate limits
-                time.sleep(1)
+        # Split content into batches to avoid API limits
+        jobs.extend((merged_section.content, batch) for batch in _split_batches(section.content, batch_size))
         
         # Process subsections
-        for subsection in section["subsections"]:
-            merged_subsection = {
-                "title": subsection["title"],
-                "number": subsection["number"],
-                "content": []
-            }
+        for subsection in section.subsections:
+            merged_subsection = Subsection(subsection.title, subsection.number)
             
-            # Merge content in the subsection
-            if subsection["content"]:
-                # Split content into batches to avoid API limits
-                for i in range(0, len(subsection["content"]), batch_size):
-                    batch = subsection["content"][i:i+batch_size]
-                    
-                    # Call API to get paragraph structure
-                    paragraph_structure = call_gpt4o_mini(batch, api_key)
-                    
-                    # Merge paragraphs according to API response
-                    for paragraph in paragraph_structure:
-                        merged_paragraph = " ".join([batch[idx] for idx in paragraph["chunk_indices"]])
-                        merged_subsection["content"].append(merged_paragraph)
-                    
-                    # Add delay to avoid rate limits
-                    time.sleep(1)
+            jobs.extend((merged_subsection.content, batch) for batch in _split_batches(subsection.content, batch_size))
             
-            merged_section["subsections"].append(merged_subsection)
+            merged_section.subsections.append(merged_subsection)
         
         merged_sections.append(merged_section)
     
+    # Batches whose paragraph boundaries the local heuristics decide confidently skip the API
+    local_paragraphs = [None if _needs_api(batch) else auto_merge_text_chunks(batch) for _, batch in jobs]
+    api_jobs = [i for i, paragraphs in enumerate(local_paragraphs) if paragraphs is None]
+    print(f"{len(jobs) - len(api_jobs)}/{len(jobs)} batches merged locally without the API")
+    
+    structures = [None] * len(jobs)
+    keys = {i: _batch_cache_key(jobs[i][1]) for i in api_jobs}
+    cache = shelve.open(cache_path) if cache_path else None
+    
+    try:
+        # Only batches without a cached answer go to the API
+        pending = []
+        for i in api_jobs:
+            if cache is not None and keys[i] in cache:
+                structures[i] = cache[keys[i]]
+            else:
+                pending.append(i)
+        
+        if cache is not None:
+            print(f"{len(api_jobs) - len(pending)}/{len(api_jobs)} API batches loaded from cache")
+        
+        # Pack several batches into each request
+        packed_jobs = [pending[i:i+batches_per_request] for i in range(0, len(pending), batches_per_request)]
+        
+        # Rate limiter replaces the fixed delay between calls
+        rate_limiter = RateLimiter(requests_per_minute)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda packed: call_gpt4o_mini([jobs[i][1] for i in packed], api_key, rate_limiter),
+                packed_jobs
+            )
+            
+            # executor.map yields results in submission order
+            for packed, answers in zip(packed_jobs, tqdm(results, total=len(packed_jobs), desc="API requests")):
+                for i, paragraph_structure in zip(packed, answers):
+                    structures[i] = paragraph_structure
+                    # Only real API answers are cached, never the fallback
+                    if paragraph_structure is not None and cache is not None:
+                        cache[keys[i]] = paragraph_structure
+    finally:
+        if cache is not None:
+            cache.close()
+    
+    for (content, batch), paragraphs, paragraph_structure in zip(jobs, local_paragraphs, structures):
+        if paragraphs is not None:
+            content.extend(paragraphs)
+            continue
+        
+        if paragraph_structure is None:
+            # If the API gave no usable answer, merge all blocks into one paragraph
+            paragraph_structure = _fallback_structure(batch)
+        
+        # Merge paragraphs according to API response
+        content.extend(_merge_batch(batch, paragraph_structure))
+    
     return merged_sections
 
+def _closes_sentence(chunk):
+    """Check if a chunk ends with sentence punctuation that is not part of an abbreviation (e.g., i.e., etc.)"""
+    return chunk[-1:] in _SENTENCE_END and not _ABBREV_RE.search(chunk[-_TAIL_LENGTH:])
+
+def _is_title(chunk):
+    """Check if a chunk is a title, which auto_merge_text_chunks always keeps as its own paragraph"""
+    return _match_article_number(chunk) is not None or _TITLE_RE.match(chunk) is not None
+
+def _is_ambiguous(prev_chunk, chunk):
+    """Check if the auto-merge heuristics cannot confidently tell whether chunk continues prev_chunk
+    
+    A finished sentence followed by a capital letter, or an unfinished one followed by
+    a lowercase letter, is clear-cut; the mixed cases are left to the API.
+    """
+    # Titles stand alone and list items always start a new paragraph
+    if _is_title(prev_chunk) or _is_title(chunk) or _LIST_RE.match(chunk):
+        return False
+    return _closes_sentence(prev_chunk) != chunk[:1].isupper()
+
+def _needs_api(batch):
+    """Check if any block boundary in a batch is ambiguous for the auto-merge heuristics"""
+    return any(_is_ambiguous(batch[i], batch[i+1]) for i in range(len(batch) - 1))
+
 def auto_merge_text_chunks(chunks):
     """Automatically merge text chunks without using API"""
     merged_paragraphs = []
     current_paragraph = []
+    # Whether the most recently added chunk ends a sentence
+    prev_closes_sentence = False
     current_title = None
     
     for i, chunk in enumerate(chunks):
         # Check if this chunk is a title
-        if is_article_number(chunk):
+        article_number = _match_article_number(chunk)
+        if article_number is not None:
             # If we have accumulated text, save it as a paragraph
             if current_paragraph:
-                merged_paragraphs.append(" ".join(current_paragraph))
+                merged_paragraphs.append(_join_chunks(current_paragraph))
                 current_paragraph = []
             
             # Save this title as a separate paragraph
             merged_paragraphs.append(chunk)
-            current_title = extract_article_number(chunk)
+            current_title = article_number
             continue
         
         # Check if this chunk starts with a title pattern
-        title_match = re.match(r'^(\d+\.\d+(\.\d+)*\.?)\s+(.+)$', chunk)
+        title_match = _TITLE_RE.match(chunk)
         if title_match:
             # If we have accumulated text, save it as a paragraph
             if current_paragraph:
-                merged_paragraphs.append(" ".join(current_paragraph))
+                merged_paragraphs.append(_join_chunks(current_paragraph))
                 current_paragraph = []
             
             # Save this title+text as a separate paragraph
@@ -440,36 +694,33 @@ def auto_merge_text_chunks(chunks):
             continue
         
         # Check if this is a numbered list item
-        list_item_match = re.match(r'^(\d+\)|\w+\))\s+(.+)$', chunk)
+        list_item_match = _LIST_RE.match(chunk)
         if list_item_match:
             # If we have accumulated text, save it as a paragraph
             if current_paragraph:
-                merged_paragraphs.append(" ".join(current_paragraph))
+                merged_paragraphs.append(_join_chunks(current_paragraph))
                 current_paragraph = []
             
             # Start a new paragraph with this list item
             current_paragraph.append(chunk)
+            prev_closes_sentence = _closes_sentence(chunk)
             continue
         
-        # Check if this chunk ends with a sentence-ending punctuation
-        if current_paragraph and current_paragraph[-1][-1] in ['.', '!', '?', ':', ';']:
-            # If the previous chunk ended with punctuation, this might be a new paragraph
-            # But we need to check if it's not a continuation (e.g., "e.g.", "i.e.", etc.)
-            prev_ends_with_abbrev = re.search(r'(e\.g\.|i\.e\.|etc\.)$', current_paragraph[-1])
-            if not prev_ends_with_abbrev:
-                # If not an abbreviation, check if this chunk starts with a capital letter
-                if chunk and chunk[0].isupper():
-                    # Likely a new paragraph
-                    merged_paragraphs.append(" ".join(current_paragraph))
-                    current_paragraph = [chunk]
-                    continue
+        # If the previous chunk ended a sentence and this chunk starts with a capital letter,
+        # this is likely a new paragraph
+        if current_paragraph and prev_closes_sentence and chunk[:1].isupper():
+            merged_paragraphs.append(_join_chunks(current_paragraph))
+            current_paragraph = [chunk]
+            prev_closes_sentence = _closes_sentence(chunk)
+            continue
         
         # If none of the above conditions are met, add to current paragraph
         current_paragraph.append(chunk)
+        prev_closes_sentence = _closes_sentence(chunk)
     
     # Add the last paragraph if it exists
     if current_paragraph:
-        merged_paragraphs.append(" ".join(current_paragraph))
+        merged_paragraphs.append(_join_chunks(current_paragraph))
     
     return merged_paragraphs
 
@@ -479,20 +730,20 @@ def format_output(merged_sections):
     
     for section in merged_sections:
         # Add section title
-        output_lines.append(section["title"])
+        output_lines.append(section.title)
         
         # Add section content
-        for paragraph in section["content"]:
+        for paragraph in section.content:
             output_lines.append(paragraph)
             output_lines.append("")  # Empty line after paragraph
         
         # Add subsections
-        for subsection in section["subsections"]:
+        for subsection in section.subsections:
             # Add subsection title
-            output_lines.append(subsection["title"])
+            output_lines.append(subsection.title)
             
             # Add subsection content
-            for paragraph in subsection["content"]:
+            for paragraph in subsection.content:
                 output_lines.append(paragraph)
                 output_lines.append("")  # Empty line after paragraph
     
@@ -500,14 +751,15 @@ def format_output(merged_sections):
 
 def save_to_txt(content, output_file):
     """Save content to text file"""
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for line in content:
-            f.write(line + '\n')
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        # One write of the joined text instead of one write per line
+        f.write('\n'.join(content))
+        f.write('\n')
 
 def save_to_json(sections, output_file):
     """Save sections to JSON file"""
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(sections, f, ensure_ascii=False, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(sections, option=orjson.OPT_INDENT_2))
 
 def main():
     parser = argparse.ArgumentParser(description="Extract and process Part 1 content from HTML files")
@@ -521,6 +773,14 @@ def main():
                         help="OpenAI API key")
     parser.add_argument("--no-api", action="store_true",
                         help="Don't use API for paragraph merging")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="Number of concurrent API requests (default: 8)")
+    parser.add_argument("--requests-per-minute", type=int, default=500,
+                        help="Maximum API requests per minute (default: 500)")
+    parser.add_argument("--cache", default=".gpt_cache",
+                        help="Cache file for API results (default: .gpt_cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't read or write the API result cache")
     
     args = parser.parse_args()
     
@@ -540,25 +800,26 @@ def main():
         merged_sections = []
         
         for section in sections:
-            merged_section = {
-                "title": section["title"],
-                "number": section["number"],
-                "subsections": [],
-                "content": auto_merge_text_chunks(section["content"])
-            }
+            merged_section = Section(section.title, section.number,
+                                     content=auto_merge_text_chunks(section.content))
             
-            for subsection in section["subsections"]:
-                merged_subsection = {
-                    "title": subsection["title"],
-                    "number": subsection["number"],
-                    "content": auto_merge_text_chunks(subsection["content"])
-                }
-                merged_section["subsections"].append(merged_subsection)
+            for subsection in section.subsections:
+                merged_subsection = Subsection(subsection.title, subsection.number,
+                                               auto_merge_text_chunks(subsection.content))
+                merged_section.subsections.append(merged_subsection)
             
             merged_sections.append(merged_section)
     else:
         print("Using API for paragraph merging")
-        merged_sections = merge_paragraphs_in_sections(sections, args.api_key)
+        # One pooled connection per worker thread, so no request waits for or discards a connection
+        _SESSION.mount('https://', _http_adapter(args.max_workers))
+        merged_sections = merge_paragraphs_in_sections(
+            sections,
+            args.api_key,
+            max_workers=args.max_workers,
+            requests_per_minute=args.requests_per_minute,
+            cache_path=None if args.no_cache else args.cache
+        )
     
     # Format output
     output_content = format_output(merged_sections)
@@ -1,56 +1,137 @@
 import os
 import re
-import json
-import requests
+import orjson
+import io
 import time
-from bs4 import BeautifulSoup
+import argparse
+import gzip
+import hashlib
+import shelve
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from lxml import etree
+
+# Section titles such as "2.1" or "Section 2.1."
+_SECTION_RE = re.compile(r'^(2\.\d+\.?)$')
+_SECTION_WORD_RE = re.compile(r'^Section\s+2\.\d+\.')
+# Subsection titles such as "2.1.1." or "2.1.1.1."
+_SUBSECTION_RE = re.compile(r'^(2\.\d+\.\d+\.?)$|^(2\.\d+\.\d+\.\d+\.?)$')
+# Page headers and footers: the running title, copyright line, short
+# "Division A" headers (under 15 characters) and footers such as "2-3 Division A"
+_REJECT_RE = re.compile(r'National Building Code of Canada|Copyright ©|Division A[\s\S]{0,4}\Z|\d+-\d+\s+Division\s+A$')
+
+# Separates the fragments of a section in the prompt
+_FRAGMENT_DELIMITER = "\n---\n"
+
+# Model and endpoint used for paragraph merging
+_MODEL = "gpt-4o-mini"
+_API_BASE = "https://api.openai.com/v1"
+# Model and OpenAI-compatible endpoint of a local Ollama server, used with --local
+_LOCAL_MODEL = "llama3.1:8b"
+_LOCAL_API_BASE = "http://localhost:11434/v1"
+# Largest completion gpt-4o-mini can return
+_MAX_OUTPUT_TOKENS = 16384
+_SYSTEM_PROMPT = "You are a professional text processing assistant responsible for merging fragmented text into coherent paragraphs. Always respond in English and do not translate the content. Respond with a JSON object only."
 
-def load_html_file(html_file):
-    """Load HTML file"""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        return f.read()
+def _http_adapter(pool_size):
+    """HTTP adapter keeping up to pool_size keep-alive connections per host;
+    rate-limit and transient server errors are retried with exponential backoff"""
+    return HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "POST"])
+        )
+    )
 
-def extract_part2_content(html_content):
-    """Extract Part 2 content from HTML content"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+# Shared HTTP session so worker threads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', _http_adapter(20))
+
+class RateLimiter:
+    """Space out API calls made from several threads to a maximum rate"""
+    
+    def __init__(self, requests_per_minute):
+        """Initialize rate limiter
+        
+        Args:
+            requests_per_minute: Maximum number of calls allowed per minute
+        """
+        self.interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_time = 0.0
     
-    # Find all page divs
-    pages = soup.find_all('div', class_='page')
+    def wait(self):
+        """Block until the caller is allowed to issue the next request"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def _open_html(html_file):
+    """Open an HTML file for parsing as bytes, decompressing it if the path ends in .gz"""
+    if html_file.endswith(".gz"):
+        return gzip.open(html_file, 'rb')
+    return open(html_file, 'rb')
+
+def extract_part2_content(html_file):
+    """Yield the Part 2 paragraphs of an HTML file one at a time
     
-    part2_content = []
+    Paragraphs are produced while the pages are streamed, so
+    process_part2_content can organize them without an intermediate list.
+    """
     found_part2 = False
-    part3_started = False
     
-    # Iterate through all pages to find Part 2 start and end
-    for page in pages:
-        page_number = page.get('data-page-number', '')
-        
-        # Check if this is page 51 (start of Part 2)
-        if page_number == '51':
-            found_part2 = True
-            print(f"Found start of Part 2 on page {page_number}")
-        
-        # Check if Part 3 has started (if it exists)
-        if found_part2 and page.find('p', string=re.compile(r'Part 3')):
-            part3_started = True
-            print(f"Found start of Part 3 on page {page_number}")
-            break
-        
-        # If Part 2 found and Part 3 not yet started, extract all text from this page
-        if found_part2 and not part3_started:
-            # Get all paragraph text from the page
-            paragraphs = page.find_all('p')
-            for p in paragraphs:
-                text = p.get_text().strip()
-                if text and not text.startswith("National Building Code of Canada") and not text.startswith("Copyright ©"):
-                    # Exclude headers and footers
-                    if not (text.startswith("Division A") and len(text) < 15) and not re.match(r'^\d+-\d+\s+Division\s+A$', text):
-                        part2_content.append(text)
-    
-    return part2_content
+    # gzip-compressed chunks from pdf_convert.py --compress are decompressed while streaming
+    with _open_html(html_file) as source:
+        # Stream page divs instead of building the whole document tree
+        for _, page in etree.iterparse(source, events=("end",), tag="div", html=True, encoding="utf-8"):
+            # Nested divs (such as image placeholders) are handled as part of their page
+            if 'page' not in (page.get('class') or '').split():
+                continue
+            
+            page_number = page.get('data-page-number', '')
+            
+            # Check if this is page 51 (start of Part 2)
+            if not found_part2 and page_number == '51':
+                found_part2 = True
+                print(f"Found start of Part 2 on page {page_number}")
+            
+            # Pages before Part 2 are freed without touching their paragraphs
+            if found_part2:
+                # Get all paragraph text from the page once, for both the Part 3 check and extraction
+                # Paragraphs written by pdf_convert.py have no child elements, so their text is p.text
+                texts = [(p.text or "") if len(p) == 0 else "".join(p.itertext()) for p in page.iter('p')]
+                
+                # Check if Part 3 has started (if it exists)
+                if any('Part 3' in text for text in texts):
+                    print(f"Found start of Part 3 on page {page_number}")
+                    break
+                
+                # Part 2 has started and Part 3 has not, so extract all text from this page,
+                # excluding empty paragraphs, headers and footers
+                yield from [text for text in map(str.strip, texts) if text and not _REJECT_RE.match(text)]
+            
+            # Free the page and the already processed pages before it
+            page.clear()
+            while page.getprevious() is not None:
+                del page.getparent()[0]
 
 def process_part2_content(content):
-    """Process Part 2 content, organize by section"""
+    """Process Part 2 content, organize by section
+    
+    Args:
+        content: Iterable of Part 2 paragraphs, such as the extract_part2_content generator
+    """
     sections = []
     current_section = {"title": "Part 2 - Objectives", "content": []}
     
@@ -60,7 +141,7 @@ def process_part2_content(content):
             continue
             
         # Check if this is a new section title
-        if re.match(r'^(2\.\d+\.?)$', line) or re.match(r'^Section\s+2\.\d+\.', line):
+        if _SECTION_RE.match(line) or _SECTION_WORD_RE.match(line):
             # Save previous section
             if current_section["content"]:
                 sections.append(current_section)
@@ -68,7 +149,7 @@ def process_part2_content(content):
             # Create new section
             current_section = {"title": line, "content": []}
         # Check if this is a subsection title
-        elif re.match(r'^(2\.\d+\.\d+\.?)$', line) or re.match(r'^(2\.\d+\.\d+\.\d+\.?)$', line):
+        elif _SUBSECTION_RE.match(line):
             # Save previous subsection
             if current_section["content"]:
                 sections.append(current_section)
@@ -85,66 +166,308 @@ def process_part2_content(content):
     
     return sections
 
-def call_gpt_api(section_content, api_key):
-    """Call GPT API to merge paragraphs"""
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
+def group_sections(sections, max_chars=6000):
+    """Group consecutive sections so that each group's fragments, with their delimiters, stay under max_chars
+    
+    A section larger than max_chars on its own still gets a group of its own.
+    """
+    groups = []
+    current_group = []
+    current_chars = 0
+    
+    for section in sections:
+        section_chars = sum(map(len, section["content"])) + len(_FRAGMENT_DELIMITER) * len(section["content"])
+        if current_group and current_chars + section_chars > max_chars:
+            groups.append(current_group)
+            current_group = []
+            current_chars = 0
+        current_group.append(section)
+        current_chars += section_chars
     
+    if current_group:
+        groups.append(current_group)
+    
+    return groups
+
+def _estimate_max_tokens(sections):
+    """Upper bound on the completion tokens needed to return a group of merged sections"""
+    chars = sum(len(fragment) for section in sections for fragment in section["content"])
+    # Merged text is about as long as the input, roughly 4 characters per token;
+    # allow twice that plus room for the JSON keys
+    return min(_MAX_OUTPUT_TOKENS, chars // 2 + 32 * len(sections) + 64)
+
+def build_request_body(sections, model=_MODEL):
+    """Build the chat completion request body for a group of sections"""
+    # Plain delimited text instead of JSON: no quotes or escapes to spend input tokens on
+    sections_text = "\n\n".join(
+        f"### Section {i}: {section['title']}\n{_FRAGMENT_DELIMITER.join(section['content'])}"
+        for i, section in enumerate(sections)
+    )
     prompt = f"""
-Please merge the following text fragments into coherent paragraphs. These texts are from a building code document and might have been split into multiple lines due to PDF to HTML conversion.
-Please maintain the original meaning and technical terminology, just fix the sentence breaks to make it complete and coherent paragraphs.
+Please merge the text fragments of each of the following sections into coherent paragraphs. These texts are from a building code document and might have been split into multiple lines due to PDF to HTML conversion.
+Please maintain the original meaning and technical terminology, just fix the sentence breaks to make it complete and coherent paragraphs. Never move text from one section to another.
 
 DO NOT translate the text. Keep it in its original English language.
 
-Text content:
-{json.dumps(section_content, ensure_ascii=False)}
+Each section starts with a line "### Section <id>: <title>", and its fragments are separated by lines containing only "---".
+
+Return a JSON object mapping each section id to its merged text, for example {{"0": "merged text of section 0", "1": "merged text of section 1"}}.
+
+Sections:
+{sections_text}
 """
 
-    data = {
-        "model": "gpt-4o-mini",
+    return {
+        "model": model,
         "messages": [
-            {"role": "system", "content": "You are a professional text processing assistant responsible for merging fragmented text into coherent paragraphs. Always respond in English and do not translate the content."},
+            {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "temperature": 0.3
+        "response_format": {"type": "json_object"},
+        # Deterministic output; merging should not rephrase anything
+        "temperature": 0,
+        "max_tokens": _estimate_max_tokens(sections)
+    }
+
+def parse_merged_texts(sections, result):
+    """Map a chat completion result back onto a group of sections
+    
+    Returns:
+        List of merged texts, one per section in the group, None where the section is missing from the response
+    """
+    merged_texts = [None] * len(sections)
+    merged = orjson.loads(result["choices"][0]["message"]["content"])
+    
+    for i in range(len(sections)):
+        merged_text = merged.get(str(i))
+        if isinstance(merged_text, str):
+            merged_texts[i] = merged_text
+        else:
+            print(f"API response is missing section: {sections[i]['title']}")
+    
+    return merged_texts
+
+def call_gpt_api(sections, api_key, rate_limiter=None, api_base=_API_BASE, model=_MODEL, timeout=60):
+    """Call GPT API to merge paragraphs for a group of sections in one request
+    
+    Args:
+        sections: Sections to merge in this request
+        api_key: OpenAI API key
+        rate_limiter: Optional RateLimiter shared between threads
+        api_base: Base URL of an OpenAI-compatible API
+        model: Model name
+        timeout: Request timeout in seconds
+    
+    Returns:
+        List of merged texts, one per section in the group, None where there is no usable answer
+    """
+    url = f"{api_base}/chat/completions"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
     }
     
+    data = build_request_body(sections, model)
+    
     try:
-        response = requests.post(url, headers=headers, json=data)
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        response = _SESSION.post(url, headers=headers, json=data, timeout=timeout)
         response.raise_for_status()
-        result = response.json()
-        merged_text = result["choices"][0]["message"]["content"]
-        return merged_text
+        return parse_merged_texts(sections, orjson.loads(response.content))
     except Exception as e:
         print(f"API call error: {e}")
         if 'response' in locals():
             print(f"API response: {response.text}")
-        # If API call fails, return simple merge of original content
-        return " ".join(section_content)
+        return [None] * len(sections)
+
+def _section_cache_key(content, model=_MODEL, api_base=_API_BASE):
+    """Cache key for a section: depends on the endpoint, the model, the instructions and the text fragments"""
+    fingerprint = orjson.dumps([api_base, model, "part2", _SYSTEM_PROMPT, content])
+    return hashlib.sha256(fingerprint).hexdigest()
 
-def merge_sections_with_gpt(sections, api_key):
-    """Use GPT to merge content for each section"""
-    merged_sections = []
+def _merge_sections(sections, merge_groups, cache_path, model=_MODEL, api_base=_API_BASE):
+    """Merge the content of each section, serving sections seen before from the cache
     
-    for i, section in enumerate(sections):
-        print(f"Processing section {i+1}/{len(sections)}: {section['title']}")
+    Args:
+        sections: Sections to merge
+        merge_groups: Callable taking a list of section groups and returning, in order,
+            one list of merged texts (None where there is no usable answer) per group
+        cache_path: Path of the shelve cache of merged texts, None to disable caching
+        model: Model name, part of the cache key
+        api_base: Base URL of the API answering the requests, part of the cache key
+    
+    Returns:
+        List of merged sections
+    """
+    # Empty sections merge to an empty string; only sections with content need the API
+    merged_texts = [""] * len(sections)
+    indices = [i for i, section in enumerate(sections) if section["content"]]
+    keys = {i: _section_cache_key(sections[i]["content"], model, api_base) for i in indices}
+    # Merged text per distinct section content, so repeated sections are merged once
+    results = {}
+    cache = shelve.open(cache_path) if cache_path else None
+    
+    try:
+        # Only the first section with each uncached content goes to the API
+        pending = []
+        for i in indices:
+            key = keys[i]
+            if key in results:
+                continue
+            if cache is not None and key in cache:
+                results[key] = cache[key]
+            else:
+                results[key] = None
+                pending.append(i)
         
-        # If section content is not empty, call GPT to merge
-        if section["content"]:
-            merged_content = call_gpt_api(section["content"], api_key)
-            time.sleep(1)  # Avoid API rate limits
-        else:
-            merged_content = ""
+        if cache is not None:
+            print(f"{len(results) - len(pending)}/{len(results)} distinct sections loaded from cache")
+        
+        groups = group_sections([sections[i] for i in pending])
+        print(f"Merging {len(pending)} distinct sections in {len(groups)} requests")
+        
+        # Groups are consecutive runs of pending sections, so the flattened answers line up with pending
+        answers = chain.from_iterable(merge_groups(groups)) if groups else ()
+        for i, merged_text in zip(pending, answers):
+            if merged_text is None:
+                # If the API gave no usable answer, use a simple merge of the original content
+                merged_text = " ".join(sections[i]["content"])
+            elif cache is not None:
+                # Only real API answers are cached, never the fallback
+                cache[keys[i]] = merged_text
+            results[keys[i]] = merged_text
+    finally:
+        if cache is not None:
+            cache.close()
+    
+    # Fan the merged texts back out to every section with the same content
+    for i in indices:
+        merged_texts[i] = results[keys[i]]
+    
+    return [{"title": section["title"], "content": merged_text}
+            for section, merged_text in zip(sections, merged_texts)]
+
+def merge_sections_with_gpt(sections, api_key, max_workers=8, requests_per_minute=500, cache_path=".gpt_cache",
+                            api_base=_API_BASE, model=_MODEL, timeout=60):
+    """Use GPT to merge content for each section
+    
+    Consecutive small sections are grouped into a single request, and the
+    groups are sent concurrently from a thread pool with at most max_workers
+    requests in flight and at most requests_per_minute requests started per
+    minute; results keep the section order. Requests rejected with 429 are
+    retried with backoff by the shared session.
+    
+    Args:
+        cache_path: Path of the shelve cache of merged texts, None to disable caching
+        api_base: Base URL of an OpenAI-compatible API, such as a local Ollama server
+        model: Model name
+        timeout: Request timeout in seconds
+    """
+    rate_limiter = RateLimiter(requests_per_minute)
+    
+    def merge_groups(groups):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map yields results in submission order
+            yield from executor.map(
+                lambda group: call_gpt_api(group, api_key, rate_limiter, api_base, model, timeout),
+                groups
+            )
+    
+    return _merge_sections(sections, merge_groups, cache_path, model, api_base)
+
+def run_batch_job(groups, api_key, poll_interval=30):
+    """Submit groups to the OpenAI Batch API and wait for the job to finish
+    
+    Returns:
+        Dictionary mapping custom_id (the group index) to its chat completion result
+    """
+    base_url = _API_BASE
+    headers = {"Authorization": f"Bearer {api_key}"}
+    
+    # Build the batch input file in memory, one request per group
+    lines = []
+    for i, group in enumerate(groups):
+        lines.append(orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": build_request_body(group)
+        }))
+    batch_file = io.BytesIO(b"\n".join(lines))
+    
+    # Upload the input file
+    response = _SESSION.post(f"{base_url}/files", headers=headers,
+                             data={"purpose": "batch"},
+                             files={"file": ("batch.jsonl", batch_file)},
+                             timeout=300)
+    response.raise_for_status()
+    input_file_id = orjson.loads(response.content)["id"]
+    
+    # Create the batch job
+    response = _SESSION.post(f"{base_url}/batches", headers=headers,
+                             json={"input_file_id": input_file_id,
+                                   "endpoint": "/v1/chat/completions",
+                                   "completion_window": "24h"},
+                             timeout=60)
+    response.raise_for_status()
+    batch = orjson.loads(response.content)
+    print(f"Created batch {batch['id']} with {len(groups)} requests")
+    
+    # Poll until the job reaches a final status
+    while batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        response = _SESSION.get(f"{base_url}/batches/{batch['id']}", headers=headers, timeout=60)
+        response.raise_for_status()
+        batch = orjson.loads(response.content)
+        counts = batch.get("request_counts") or {}
+        print(f"Batch status: {batch['status']} ({counts.get('completed', 0)}/{counts.get('total', len(groups))} requests)")
+    
+    if batch["status"] != "completed":
+        print(f"Batch ended with status: {batch['status']}")
+    
+    # Expired or cancelled batches may still have partial output
+    results = {}
+    if batch.get("output_file_id"):
+        response = _SESSION.get(f"{base_url}/files/{batch['output_file_id']}/content", headers=headers, timeout=300)
+        response.raise_for_status()
+        for line in response.content.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            item_response = item.get("response") or {}
+            if item_response.get("status_code") == 200:
+                results[item["custom_id"]] = item_response["body"]
+    
+    return results
+
+def merge_sections_with_batch_api(sections, api_key, cache_path=".gpt_cache"):
+    """Use the OpenAI Batch API to merge content for all sections in one offline job
+    
+    Groups are built the same way as merge_sections_with_gpt; groups without
+    a usable result fall back to a simple merge of their original content.
+    
+    Args:
+        cache_path: Path of the shelve cache of merged texts, None to disable caching
+    """
+    def merge_groups(groups):
+        try:
+            results = run_batch_job(groups, api_key)
+        except Exception as e:
+            print(f"Batch API error: {e}")
+            results = {}
         
-        merged_sections.append({
-            "title": section["title"],
-            "content": merged_content
-        })
+        for i, group in enumerate(groups):
+            result = results.get(str(i))
+            try:
+                if result is None:
+                    raise ValueError(f"no result for batch request {i}")
+                yield parse_merged_texts(group, result)
+            except Exception as e:
+                print(f"Batch result error: {e}")
+                yield [None] * len(group)
     
-    return merged_sections
+    return _merge_sections(sections, merge_groups, cache_path)
 
 def format_merged_content(merged_sections):
     """Format merged content"""
@@ -165,40 +488,79 @@ def format_merged_content(merged_sections):
 
 def save_to_txt(content, output_file):
     """Save content to text file"""
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for line in content:
-            f.write(line + '\n')
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        # One write of the joined text instead of one write per line
+        f.write('\n'.join(content))
+        f.write('\n')
 
 def main():
-    # Input and output file paths
-    input_file = 'chunks/part_2_31_to_60.html'
-    output_file = 'part2_content.txt'
+    parser = argparse.ArgumentParser(description="Extract and process Part 2 content from an HTML file")
+    parser.add_argument("--input", default="chunks/part_2_31_to_60.html",
+                        help="Path to HTML file (default: chunks/part_2_31_to_60.html)")
+    parser.add_argument("--output", default="part2_content.txt",
+                        help="Output file path (default: part2_content.txt)")
+    parser.add_argument("--api-key", default="YOUR_API_KEY_HERE",
+                        help="OpenAI API key")
+    parser.add_argument("--batch", action="store_true",
+                        help="Use the OpenAI Batch API (cheaper, but may take up to 24h)")
+    parser.add_argument("--local", action="store_true",
+                        help=f"Use a local Ollama server at {_LOCAL_API_BASE} instead of the OpenAI API")
+    parser.add_argument("--local-model", default=_LOCAL_MODEL,
+                        help=f"Ollama model used with --local (default: {_LOCAL_MODEL})")
+    parser.add_argument("--max-workers", type=int, default=8,
+                        help="Number of concurrent API requests (default: 8)")
+    parser.add_argument("--requests-per-minute", type=int, default=500,
+                        help="Maximum API requests per minute (default: 500)")
+    parser.add_argument("--cache", default=".gpt_cache",
+                        help="Cache file for API results (default: .gpt_cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't read or write the API result cache")
+    
+    args = parser.parse_args()
     
-    # OpenAI API key
-    api_key = "YOUR_API_KEY_HERE"
+    if args.local and args.batch:
+        parser.error("--local cannot be combined with --batch")
+    
+    input_file = args.input
+    output_file = args.output
+    api_key = args.api_key
+    cache_path = None if args.no_cache else args.cache
+    
+    # One pooled connection per worker thread, so no request waits for or discards a connection
+    _SESSION.mount('https://', _http_adapter(args.max_workers))
+    _SESSION.mount('http://', _http_adapter(args.max_workers))
     
     # Ensure input file exists
     if not os.path.exists(input_file):
         print(f"Error: Input file {input_file} not found")
         return
     
-    # Load HTML file
-    html_content = load_html_file(input_file)
+    # Extract Part 2 content and organize it by section in a single pass over the pages
+    sections = process_part2_content(extract_part2_content(input_file))
     
-    # Extract Part 2 content
-    part2_content = extract_part2_content(html_content)
-    
-    if not part2_content:
+    if not sections:
         print("Warning: Could not find Part 2 content")
         return
     
-    # Process content, organize by section
-    sections = process_part2_content(part2_content)
-    
     print(f"Identified {len(sections)} sections")
     
     # Use GPT to merge content for each section
-    merged_sections = merge_sections_with_gpt(sections, api_key)
+    if args.batch:
+        merged_sections = merge_sections_with_batch_api(sections, api_key, cache_path=cache_path)
+    elif args.local:
+        # A local model generates much more slowly, so allow long requests
+        merged_sections = merge_sections_with_gpt(sections, api_key,
+                                                  max_workers=args.max_workers,
+                                                  requests_per_minute=args.requests_per_minute,
+                                                  cache_path=cache_path,
+                                                  api_base=_LOCAL_API_BASE,
+                                                  model=args.local_model,
+                                                  timeout=600)
+    else:
+        merged_sections = merge_sections_with_gpt(sections, api_key,
+                                                  max_workers=args.max_workers,
+                                                  requests_per_minute=args.requests_per_minute,
+                                                  cache_path=cache_path)
     
     # Format merged content
     formatted_content = format_merged_content(merged_sections)
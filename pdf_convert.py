@@ -26,6 +26,9 @@ Usage examples:
 3. Split large PDF into multiple HTML files, each containing 50 pages:
    python pdf_convert.py large_file.pdf -f html-chunks -c output_directory -p 50
 
+4. Write gzip-compressed output (any output path ending in .gz, or --compress for chunks):
+   python pdf_convert.py input.pdf -o output.html.gz --preserve-paragraphs
+
 Advanced paragraph control:
 --para-gap-factor: Adjusts the line spacing threshold, higher values make it less likely to detect new paragraphs
 --para-indent-threshold: Adjusts the indentation threshold (pixels), higher values make it less likely to detect new paragraphs based on indentation
@@ -36,9 +39,219 @@ import os
 import re
 import argparse
 from tqdm import tqdm
-import html
 import gc
+import gzip
 import sys
+import multiprocessing
+import threading
+import heapq
+from contextlib import closing, nullcontext
+from functools import lru_cache
+from itertools import islice
+
+# Pages with at least this many words always get full layout analysis
+_SPARSE_PAGE_MAX_WORDS = 100
+
+# Pages with less text than this are rendered line by line without paragraph detection
+_TRIVIAL_PAGE_MAX_CHARS = 20
+
+# Same replacements as html.escape(text, quote=True), applied in a single pass
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+_HTML_SPECIAL_RE = re.compile(r'[&<>"\']')
+
+def _escape_html(text):
+    """Escape text for HTML like html.escape; most paragraphs have nothing to escape and are returned as is"""
+    if _HTML_SPECIAL_RE.search(text):
+        return text.translate(_HTML_ESCAPE)
+    return text
+
+@lru_cache(maxsize=512)
+def _render_para_html(text):
+    """Render a paragraph as an HTML <p> element
+    
+    Running headers, footers and other lines repeated on many pages are rendered once.
+    """
+    return f'<p>{_escape_html(text)}</p>\n'
+
+# Punctuation that ends a line at a paragraph boundary
+_SENTENCE_END = frozenset(".?!:;")
+
+def _page_lines(page, textpage=None):
+    """Group the words of a page into text lines
+    
+    Uses the flat word tuples of get_text("words") instead of the nested
+    span dictionaries of get_text("dict"), so no per-span dicts are built.
+    
+    Args:
+        page: PyMuPDF page
+        textpage: Optional text page of the page, created with flags=0, to extract from
+    
+    Returns:
+        One (line_texts, line_bboxes) pair per text block, listing its non-empty lines
+        with their words joined by single spaces and their bounding boxes (x0, y0, x1, y1)
+    """
+    blocks = []
+    current_block = current_line = None
+    
+    # Words come in reading order: grouped by block, then by line within the block
+    for x0, y0, x1, y1, word, block_no, line_no, _ in page.get_text("words", flags=0, textpage=textpage):
+        if block_no != current_block:
+            current_block = block_no
+            current_line = None
+            blocks.append(([], []))
+        line_words, line_bboxes = blocks[-1]
+        
+        if line_no != current_line:
+            current_line = line_no
+            line_words.append([word])
+            line_bboxes.append([x0, y0, x1, y1])
+        else:
+            line_words[-1].append(word)
+            bbox = line_bboxes[-1]
+            bbox[0] = min(bbox[0], x0)
+            bbox[1] = min(bbox[1], y0)
+            bbox[2] = max(bbox[2], x1)
+            bbox[3] = max(bbox[3], y1)
+    
+    return [([" ".join(words) for words in line_words], line_bboxes) for line_words, line_bboxes in blocks]
+
+def _paragraph_breaks(line_bboxes, first_x0, para_gap_factor, para_indent_threshold):
+    """Geometric paragraph-break flags for the consecutive non-empty lines of a text block
+    
+    Args:
+        line_bboxes: Bounding boxes (x0, y0, x1, y1) of the non-empty lines
+        first_x0: Left edge of the block's first line, the reference for indentation
+        para_gap_factor: When line spacing exceeds line height by this factor, consider it a new paragraph
+        para_indent_threshold: When line indentation exceeds this pixel value, consider it a new paragraph
+    
+    Returns:
+        One flag per line: None if the line cannot start a new paragraph (the first line, or the
+        previous line has no usable position), otherwise whether spacing or indentation starts one
+    """
+    breaks = [None]
+    prev_y1 = line_bboxes[0][3]
+    
+    # Unpack each box once and carry the previous bottom edge instead of indexing back into the list
+    for x0, y0, _, y1 in islice(line_bboxes, 1, None):
+        if prev_y1 > 0:
+            # 1. Line spacing > para_gap_factor * line height, or
+            # 2. Significant indentation (> para_indent_threshold)
+            breaks.append((y0 - prev_y1 > para_gap_factor * (y1 - y0)) or (x0 - first_x0 > para_indent_threshold))
+        else:
+            breaks.append(None)
+        prev_y1 = y1
+    
+    return breaks
+
+def _iter_page_batches(start_page, end_page, batch_size):
+    """Yield consecutive lists of page numbers covering start_page..end_page-1"""
+    for i in range(start_page, end_page, batch_size):
+        yield list(range(i, min(i + batch_size, end_page)))
+
+# Converter owned by a worker process of the page pool
+_worker_converter = None
+
+def _init_worker(pdf_path):
+    """Open a separate document handle in each worker process; PyMuPDF documents cannot be shared"""
+    global _worker_converter
+    _worker_converter = PDFConverter(pdf_path)
+    _worker_converter.doc = fitz.open(pdf_path, filetype="pdf")
+    _worker_converter.total_pages = _worker_converter.doc.page_count
+    # Collect once per batch in _extract_pages_worker rather than whenever allocations pile up
+    gc.disable()
+
+def _extract_pages_worker(task):
+    """Extract a batch of pages in a worker process
+    
+    Args:
+        task: (batch_index, page_nums, extract_kwargs) tuple
+    
+    Returns:
+        (batch_index, page_texts) tuple, with the page texts in page order
+    """
+    batch_index, page_nums, extract_kwargs = task
+    page_texts = [_worker_converter._extract_page_text_simple(page_num, **extract_kwargs) for page_num in page_nums]
+    # Collect the batch's garbage, then empty MuPDF's font and glyph store, which Python's gc cannot reach
+    gc.collect()
+    fitz.TOOLS.store_shrink(100)
+    return batch_index, page_texts
+
+def _iter_paragraphs(line_texts, line_bboxes, para_gap_factor, para_indent_threshold):
+    """Split the lines of a text block into paragraphs
+    
+    Args:
+        line_texts: Texts of the block's non-empty lines
+        line_bboxes: Bounding boxes (x0, y0, x1, y1) of those lines
+        para_gap_factor: When line spacing exceeds line height by this factor, consider it a new paragraph
+        para_indent_threshold: When line indentation exceeds this pixel value, consider it a new paragraph
+    
+    Yields:
+        (paragraph, followed_by_break) tuples; followed_by_break is True when the next line
+        starts a new paragraph, and False after a forced split or at the end of the block
+    """
+    # Decide paragraph boundaries from the line geometry
+    breaks = _paragraph_breaks(line_bboxes, line_bboxes[0][0], para_gap_factor, para_indent_threshold)
+    para_text = []
+    
+    for line_text, geometric_break in zip(line_texts, breaks):
+        # Determine if this is a new paragraph: a spacing or indentation break,
+        # or the previous line ends with period, question mark, exclamation mark, etc.
+        # (the slice of an empty line is "", which is not in the set)
+        new_para = geometric_break is not None and (
+            geometric_break or
+            (para_text and para_text[-1][-1:] in _SENTENCE_END)
+        )
+        
+        if new_para and para_text:
+            # End previous paragraph and start a new one
+            yield " ".join(para_text), True
+            para_text = [line_text]
+        elif para_text and line_text.endswith("-"):
+            # If ending with hyphen, merge words (remove hyphen)
+            para_text.append(line_text[:-1])
+        else:
+            # Continue current paragraph
+            para_text.append(line_text)
+        
+        # If paragraph is too long, force split to avoid memory accumulation
+        if len(para_text) > 100:
+            yield " ".join(para_text), False
+            para_text = []
+    
+    # Process the last paragraph
+    if para_text:
+        yield " ".join(para_text), False
+
+# Output buffer size; converted pages are written in batches much larger than the default 8 KB
+_OUTPUT_BUFFER_SIZE = 4 * 1024 * 1024
+
+def _open_output(path):
+    """Open an output file for writing UTF-8 text through a large buffer
+    
+    Paths ending in .gz are gzip-compressed on the fly at level 1, which costs little CPU
+    and cuts the bytes written several times over.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, 'wt', compresslevel=1, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8', buffering=_OUTPUT_BUFFER_SIZE)
+
+def _write_pages(f, page_batches, page_suffix=""):
+    """Write pages to an open file as their batches arrive
+    
+    Only the batch being written is held in memory. Each batch goes out with one
+    writelines call, which copies the pages into the file's own reused buffer
+    without joining them first. f can be any text stream, such as a compressed one.
+    
+    Args:
+        f: Output text stream
+        page_batches: Iterable of lists of page texts, in page order
+        page_suffix: Text written after every page
+    """
+    for page_texts in page_batches:
+        if page_suffix:
+            f.writelines(page_text + page_suffix for page_text in page_texts)
+        else:
+            f.writelines(page_texts)
 
 class PDFConverter:
     def __init__(self, pdf_path):
@@ -55,7 +268,7 @@ class PDFConverter:
     def _open_document(self):
         """Open PDF document on demand"""
         if self.doc is None:
-            self.doc = fitz.open(self.pdf_path)
+            self.doc = fitz.open(self.pdf_path, filetype="pdf")
             self.total_pages = self.doc.page_count
             print(f"Opened PDF file: {self.pdf_path}, total pages: {self.total_pages}")
             # Force garbage collection
@@ -70,8 +283,28 @@ class PDFConverter:
             gc.collect()
             print("PDF document closed")
     
+    def _extract_sparse_graphics_page(self, page, min_content_bytes, textpage=None):
+        """Return the words of a page dominated by drawing operators, or None for a regular page
+        
+        Args:
+            page: PyMuPDF page
+            min_content_bytes: Compressed content stream size above which a page is checked
+            textpage: Optional text page of the page, created with flags=0, to extract from
+            
+        Returns:
+            List of the page's words if its compressed content streams exceed min_content_bytes but it
+            holds fewer than _SPARSE_PAGE_MAX_WORDS words, otherwise None
+        """
+        # Raw (still compressed) streams are only measured, so they need not be decompressed
+        content_bytes = sum(len(self.doc.xref_stream_raw(xref)) for xref in page.get_contents())
+        if content_bytes <= min_content_bytes:
+            return None
+        
+        words = [word[4] for word in page.get_text("words", flags=0, textpage=textpage)]
+        return words if len(words) < _SPARSE_PAGE_MAX_WORDS else None
+    
     def _extract_page_text_simple(self, page_num, include_html_tags=True, preserve_paragraphs=False, 
-                               para_gap_factor=1.5, para_indent_threshold=10):
+                               para_gap_factor=1.5, para_indent_threshold=10, skip_graphics_threshold=0):
         """Extract text from a single page with minimal memory usage
         
         Args:
@@ -80,201 +313,181 @@ class PDFConverter:
             preserve_paragraphs: Whether to preserve original paragraph structure
             para_gap_factor: When line spacing exceeds line height by this factor, consider it a new paragraph
             para_indent_threshold: When line indentation exceeds this pixel value, consider it a new paragraph
+            skip_graphics_threshold: Compressed content stream size in bytes above which a page with little text
+                is emitted as its plain words without layout analysis (0 disables the check)
             
         Returns:
             Page text content
         """
         try:
-            doc = self._open_document()
-            page = doc[page_num]
+            # load_page goes straight to the page; every page is read once, so loaded pages are not kept
+            page = self._open_document().load_page(page_num)
+            
+            # Paragraph detection reads the page's text more than once; extract it into a single
+            # text page that every call shares, so MuPDF parses the content stream only once
+            textpage = page.get_textpage(flags=0) if preserve_paragraphs else None
+            
+            # Diagram-heavy pages: skip the layout analysis and keep just their few words
+            if skip_graphics_threshold > 0:
+                words = self._extract_sparse_graphics_page(page, skip_graphics_threshold, textpage)
+                if words is not None:
+                    if not include_html_tags:
+                        return " ".join(words)
+                    parts = [f'<div class="page" id="page_{page_num+1}" data-page-number="{page_num+1}">\n',
+                             f'<!-- graphics-heavy page, {len(words)} words -->\n']
+                    if words:
+                        parts.append(f'<p>{_escape_html(" ".join(words))}</p>\n')
+                    parts.append('</div>\n')
+                    return "".join(parts)
+            
+            # Blank and near-blank pages (title pages, lone page numbers) have no paragraphs to detect;
+            # the plain-text extraction used to spot them is cheap, and is reused to render them
+            text = None
+            if preserve_paragraphs:
+                text = page.get_text("text", flags=0, textpage=textpage)
+                if len(text.strip()) < _TRIVIAL_PAGE_MAX_CHARS:
+                    if not include_html_tags:
+                        # Each line is its own paragraph, as in the HTML rendering below
+                        return "\n\n".join(line.strip() for line in text.splitlines() if line.strip())
+                    preserve_paragraphs = False
             
             if include_html_tags:
                 if preserve_paragraphs:
                     # Use advanced paragraph processing
-                    # Get structured info in dict format, but set flags=0 to exclude images to reduce memory usage
-                    text = page.get_text("dict", flags=0)
-                    processed_text = f'<div class="page" id="page_{page_num+1}" data-page-number="{page_num+1}">\n'
+                    # Lines are rebuilt from word tuples; flags=0 excludes images to reduce memory usage
+                    blocks = _page_lines(page, textpage)
+                    # Collect fragments and join once; repeated += would copy the page text over and over
+                    parts = [f'<div class="page" id="page_{page_num+1}" data-page-number="{page_num+1}">\n']
                     
                     # Process each text block, preserving paragraph structure
-                    for block in text["blocks"]:
-                        if block["type"] == 0:  # Text block
-                            para_text = []
-                            prev_y1 = -1
-                            para_start = True
-                            
-                            for line in block["lines"]:
-                                line_text = ""
-                                for span in line["spans"]:
-                                    line_text += span["text"]
-                                
-                                line_text = line_text.strip()
-                                if not line_text:
-                                    continue  # Skip empty lines
-                                    
-                                # Check if this is the start of a new paragraph
-                                if not para_start and prev_y1 > 0:
-                                    y_gap = line["bbox"][1] - prev_y1
-                                    line_height = line["bbox"][3] - line["bbox"][1]
-                                    x_indent = line["bbox"][0] - block["lines"][0]["bbox"][0]
-                                    
-                                    # Determine if this is a new paragraph:
-                                    # 1. Line spacing > para_gap_factor * line height, or
-                                    # 2. Significant indentation (> para_indent_threshold), or
-                                    # 3. Previous line ends with period, question mark, exclamation mark, etc.
-                                    new_para = (
-                                        (y_gap > para_gap_factor * line_height) or 
-                                        (x_indent > para_indent_threshold) or
-                                        (len(para_text) > 0 and para_text[-1] and 
-                                         para_text[-1][-1] in ['.', '?', '!', ':', ';'])
-                                    )
-                                else:
-                                    new_para = False
-                                    
-                                if new_para and para_text:
-                                    # End previous paragraph and start a new one
-                                    processed_text += f'<p>{html.escape(" ".join(para_text))}</p>\n'
-                                    para_text = [line_text]
-                                else:
-                                    # Continue current paragraph
-                                    if para_text:
-                                        if line_text.endswith("-"):
-                                            # If ending with hyphen, merge words (remove hyphen)
-                                            para_text.append(line_text[:-1])
-                                        else:
-                                            # If not ending with hyphen, add space
-                                            para_text.append(line_text)
-                                    else:
-                                        para_text.append(line_text)
-                                
-                                prev_y1 = line["bbox"][3]
-                                para_start = False
-                                
-                                # Process line by line to avoid memory accumulation
-                                if len(para_text) > 100:  # If paragraph is too long, force split
-                                    processed_text += f'<p>{html.escape(" ".join(para_text))}</p>\n'
-                                    para_text = []
-                            
-                            # Process the last paragraph
-                            if para_text:
-                                processed_text += f'<p>{html.escape(" ".join(para_text))}</p>\n'
-                        
-                        elif block["type"] == 1:  # Image block
-                            # Add placeholder for images
-                            processed_text += f'<div class="image">[Image]</div>\n'
+                    for line_texts, line_bboxes in blocks:
+                        for paragraph, _ in _iter_paragraphs(line_texts, line_bboxes,
+                                                             para_gap_factor, para_indent_threshold):
+                            parts.append(_render_para_html(paragraph))
                     
-                    processed_text += '</div>\n'
+                    parts.append('</div>\n')
                 else:
                     # Use simple line-by-line approach
-                    text = page.get_text("text")
-                    processed_text = f'<div class="page" id="page_{page_num+1}" data-page-number="{page_num+1}">\n'
+                    if text is None:
+                        text = page.get_text("text")
+                    parts = [f'<div class="page" id="page_{page_num+1}" data-page-number="{page_num+1}">\n']
                     
-                    # Simple text processing, wrap each paragraph in <p> tags
-                    lines = text.split('\n')
-                    for line in lines:
-                        if line.strip():  # Skip empty lines
-                            processed_text += f'<p>{html.escape(line)}</p>\n'
+                    # Simple text processing, wrap each non-empty line in <p> tags
+                    parts.extend(_render_para_html(line) for line in text.splitlines() if line.strip())
                     
-                    processed_text += '</div>\n'
+                    parts.append('</div>\n')
                 
-                # Help garbage collection
-                page = None
-                text = None
-                gc.collect()
-                
-                return processed_text
+                return "".join(parts)
             else:
                 # Return plain text only
                 if preserve_paragraphs:
                     # Process with paragraph structure preservation
-                    # Set flags=0 to exclude image content to reduce memory usage
-                    text_dict = page.get_text("dict", flags=0)
+                    # Lines are rebuilt from word tuples; flags=0 excludes image content to reduce memory usage
+                    blocks = _page_lines(page, textpage)
                     text_lines = []
                     
                     # Process block by block to avoid memory accumulation
-                    for block in text_dict["blocks"]:
-                        if block["type"] == 0:  # Text block
-                            para_text = []
-                            prev_y1 = -1
-                            para_start = True
-                            
-                            for line in block["lines"]:
-                                line_text = ""
-                                for span in line["spans"]:
-                                    line_text += span["text"]
-                                
-                                line_text = line_text.strip()
-                                if not line_text:
-                                    continue  # Skip empty lines
-                                    
-                                # Check if this is a new paragraph
-                                if not para_start and prev_y1 > 0:
-                                    y_gap = line["bbox"][1] - prev_y1
-                                    line_height = line["bbox"][3] - line["bbox"][1]
-                                    x_indent = line["bbox"][0] - block["lines"][0]["bbox"][0]
-                                    
-                                    # Same paragraph detection logic as in HTML version
-                                    new_para = (
-                                        (y_gap > para_gap_factor * line_height) or 
-                                        (x_indent > para_indent_threshold) or
-                                        (len(para_text) > 0 and para_text[-1] and 
-                                         para_text[-1][-1] in ['.', '?', '!', ':', ';'])
-                                    )
-                                else:
-                                    new_para = False
-                                    
-                                if new_para and para_text:
-                                    # End paragraph with double line break
-                                    text_lines.append(" ".join(para_text))
-                                    text_lines.append("")  # Empty line indicates paragraph separation
-                                    para_text = [line_text]
-                                else:
-                                    # Continue current paragraph
-                                    if para_text:
-                                        if line_text.endswith("-"):
-                                            para_text.append(line_text[:-1])
-                                        else:
-                                            para_text.append(line_text)
-                                    else:
-                                        para_text.append(line_text)
-                                
-                                prev_y1 = line["bbox"][3]
-                                para_start = False
-                                
-                                # If paragraph is too long, force split to avoid memory accumulation
-                                if len(para_text) > 100:
-                                    text_lines.append(" ".join(para_text))
-                                    para_text = []
-                            
-                            # Process last line of paragraph
-                            if para_text:
-                                text_lines.append(" ".join(para_text))
-                        
-                        elif block["type"] == 1:  # Image block
-                            # Add placeholder for images
-                            text_lines.append("[Image]")
-                            text_lines.append("")  # Empty line after image
-                    
-                    # Help garbage collection
-                    page = None
-                    text_dict = None
-                    gc.collect()
+                    for line_texts, line_bboxes in blocks:
+                        for paragraph, followed_by_break in _iter_paragraphs(line_texts, line_bboxes,
+                                                                             para_gap_factor, para_indent_threshold):
+                            text_lines.append(paragraph)
+                            if followed_by_break:
+                                text_lines.append("")  # Empty line indicates paragraph separation
                     
                     return "\n".join(text_lines)
                 else:
                     # Simple text extraction without paragraph preservation
-                    text = page.get_text("text")
-                    
-                    # Help garbage collection
-                    page = None
-                    gc.collect()
-                    
-                    return text
+                    return page.get_text("text")
         except Exception as e:
             print(f"Error extracting text from page {page_num}: {e}")
             return ""
     
+    def _page_pool(self, workers):
+        """Process pool for page extraction, or a null context when extracting in this process
+        
+        Workers are recycled after a few batches so PyMuPDF's memory growth stays bounded.
+        """
+        if workers > 1:
+            return multiprocessing.Pool(workers, initializer=_init_worker, initargs=(self.pdf_path,),
+                                        maxtasksperchild=4)
+        return nullcontext()
+    
+    def _iter_page_texts(self, start_page, end_page, chunk_size, pool=None, workers=1, **extract_kwargs):
+        """Yield the extracted texts of the pages from start_page to end_page-1, one list per chunk, in page order
+        
+        Callers must close the generator (e.g. with contextlib.closing) before leaving the pool's
+        context: with a pool, its task feeder may be blocked until the generator is closed, and
+        the pool cannot terminate while it is.
+        
+        Args:
+            start_page: First page number (0-based)
+            end_page: Page number after the last page
+            chunk_size: Number of pages to process at once (memory control); also the
+                number of pages per task sent to the pool
+            pool: Optional process pool from _page_pool
+            workers: Number of processes in the pool
+            **extract_kwargs: Arguments for _extract_page_text_simple
+        """
+        if pool is None:
+            # Automatic collections would keep rescanning the page objects of the current chunk;
+            # collect once per chunk instead
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                # Process pages in chunks to control memory usage
+                for i in range(start_page, end_page, chunk_size):
+                    end = min(i + chunk_size, end_page)
+                    
+                    page_texts = [self._extract_page_text_simple(page_num, **extract_kwargs)
+                                  for page_num in tqdm(range(i, end), desc=f"Pages {i+1}-{end}")]
+                    
+                    # Force garbage collection and empty MuPDF's font and glyph store after each chunk
+                    gc.collect()
+                    fitz.TOOLS.store_shrink(100)
+                    
+                    yield page_texts
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            return
+        
+        # Batches finished ahead of a slow one wait in a heap until their turn; the semaphore
+        # stops the pool's task feeder while too many batches are submitted but not yet yielded
+        max_pending = 4 * workers
+        pending = threading.Semaphore(max_pending)
+        # Set once this generator stops, so the feeder submits nothing more after being released
+        stopped = threading.Event()
+        
+        def tasks():
+            for batch_index, page_nums in enumerate(_iter_page_batches(start_page, end_page, chunk_size)):
+                pending.acquire()
+                if stopped.is_set():
+                    return
+                yield batch_index, page_nums, extract_kwargs
+        
+        finished = []
+        next_index = 0
+        try:
+            with tqdm(total=end_page - start_page, desc=f"Pages {start_page+1}-{end_page}") as progress:
+                # imap_unordered keeps every worker busy even when one batch takes much longer
+                for batch_index, page_texts in pool.imap_unordered(_extract_pages_worker, tasks()):
+                    heapq.heappush(finished, (batch_index, page_texts))
+                    
+                    # Yield every batch that is now next in page order
+                    while finished and finished[0][0] == next_index:
+                        _, page_texts = heapq.heappop(finished)
+                        next_index += 1
+                        pending.release()
+                        progress.update(len(page_texts))
+                        yield page_texts
+        finally:
+            # Never leave the task feeder blocked, so the pool can shut down
+            stopped.set()
+            pending.release(max_pending)
+    
     def convert_to_html_chunks(self, output_dir, chunk_size=10, pages_per_chunk=100, 
-                             preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10):
+                             preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10,
+                             workers=1, skip_graphics_threshold=0, compress=False):
         """Convert PDF to multiple HTML files (chunks)
         
         Args:
@@ -284,6 +497,10 @@ class PDFConverter:
             preserve_paragraphs: Whether to preserve paragraph structure
             para_gap_factor: Line spacing threshold factor
             para_indent_threshold: Indentation threshold in pixels
+            workers: Number of processes extracting pages in parallel
+            skip_graphics_threshold: Compressed content stream size in bytes above which pages with little text
+                skip layout analysis (0 disables the check)
+            compress: Whether to write gzip-compressed .html.gz chunks
         
         Returns:
             List of created HTML files
@@ -292,52 +509,46 @@ class PDFConverter:
         os.makedirs(output_dir, exist_ok=True)
         
         # Open document
-        doc = self._open_document()
+        self._open_document()
         total_pages = self.total_pages
         
         # Calculate number of chunks
         num_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
         created_files = []
+        extension = ".html.gz" if compress else ".html"
         
-        for chunk_idx in range(num_chunks):
-            start_page = chunk_idx * pages_per_chunk
-            end_page = min(start_page + pages_per_chunk, total_pages)
-            
-            chunk_file = os.path.join(output_dir, f"part_{chunk_idx+1}_{start_page+1}_to_{end_page}.html")
-            created_files.append(chunk_file)
-            
-            print(f"Processing chunk {chunk_idx+1}/{num_chunks}: pages {start_page+1}-{end_page}")
-            
-            with open(chunk_file, 'w', encoding='utf-8') as f:
-                # Write HTML header
-                f.write('<!DOCTYPE html>\n<html>\n<head>\n')
-                f.write('<meta charset="UTF-8">\n')
-                f.write(f'<title>PDF Chunk {chunk_idx+1}: Pages {start_page+1}-{end_page}</title>\n')
-                f.write('<style>\n')
-                f.write('.page { margin-bottom: 20px; border-bottom: 1px dashed #ccc; padding-bottom: 10px; }\n')
-                f.write('</style>\n')
-                f.write('</head>\n<body>\n')
+        with self._page_pool(workers) as pool:
+            for chunk_idx in range(num_chunks):
+                start_page = chunk_idx * pages_per_chunk
+                end_page = min(start_page + pages_per_chunk, total_pages)
                 
-                # Process pages in smaller chunks to control memory usage
-                for i in range(start_page, end_page, chunk_size):
-                    sub_end = min(i + chunk_size, end_page)
+                chunk_file = os.path.join(output_dir, f"part_{chunk_idx+1}_{start_page+1}_to_{end_page}{extension}")
+                created_files.append(chunk_file)
+                
+                print(f"Processing chunk {chunk_idx+1}/{num_chunks}: pages {start_page+1}-{end_page}")
+                
+                with _open_output(chunk_file) as f:
+                    # Write HTML header
+                    f.write('<!DOCTYPE html>\n<html>\n<head>\n')
+                    f.write('<meta charset="UTF-8">\n')
+                    f.write(f'<title>PDF Chunk {chunk_idx+1}: Pages {start_page+1}-{end_page}</title>\n')
+                    f.write('<style>\n')
+                    f.write('.page { margin-bottom: 20px; border-bottom: 1px dashed #ccc; padding-bottom: 10px; }\n')
+                    f.write('</style>\n')
+                    f.write('</head>\n<body>\n')
                     
-                    for page_num in tqdm(range(i, sub_end), desc=f"Pages {i+1}-{sub_end}"):
-                        page_html = self._extract_page_text_simple(
-                            page_num, 
+                    with closing(self._iter_page_texts(
+                            start_page, end_page, chunk_size, pool, workers,
                             include_html_tags=True,
                             preserve_paragraphs=preserve_paragraphs,
                             para_gap_factor=para_gap_factor,
-                            para_indent_threshold=para_indent_threshold
-                        )
-                        f.write(page_html)
-                        f.flush()  # Ensure data is written to disk
+                            para_indent_threshold=para_indent_threshold,
+                            skip_graphics_threshold=skip_graphics_threshold
+                    )) as page_batches:
+                        _write_pages(f, page_batches)
                     
-                    # Force garbage collection after each sub-chunk
-                    gc.collect()
-                
-                # Write HTML footer
-                f.write('</body>\n</html>')
+                    # Write HTML footer
+                    f.write('</body>\n</html>')
         
         # Close document
         self._close_document()
@@ -345,7 +556,8 @@ class PDFConverter:
         return created_files
     
     def convert_to_html(self, output_path, chunk_size=5, 
-                        preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10):
+                        preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10,
+                        workers=1, skip_graphics_threshold=0):
         """Convert PDF to a single HTML file
         
         Args:
@@ -354,15 +566,18 @@ class PDFConverter:
             preserve_paragraphs: Whether to preserve paragraph structure
             para_gap_factor: Line spacing threshold factor
             para_indent_threshold: Indentation threshold in pixels
+            workers: Number of processes extracting pages in parallel
+            skip_graphics_threshold: Compressed content stream size in bytes above which pages with little text
+                skip layout analysis (0 disables the check)
         
         Returns:
             Path to the created HTML file
         """
         # Open document
-        doc = self._open_document()
+        self._open_document()
         total_pages = self.total_pages
         
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with _open_output(output_path) as f:
             # Write HTML header
             f.write('<!DOCTYPE html>\n<html>\n<head>\n')
             f.write('<meta charset="UTF-8">\n')
@@ -372,23 +587,16 @@ class PDFConverter:
             f.write('</style>\n')
             f.write('</head>\n<body>\n')
             
-            # Process pages in chunks to control memory usage
-            for i in range(0, total_pages, chunk_size):
-                end = min(i + chunk_size, total_pages)
-                
-                for page_num in tqdm(range(i, end), desc=f"Pages {i+1}-{end}"):
-                    page_html = self._extract_page_text_simple(
-                        page_num, 
+            with self._page_pool(workers) as pool:
+                with closing(self._iter_page_texts(
+                        0, total_pages, chunk_size, pool, workers,
                         include_html_tags=True,
                         preserve_paragraphs=preserve_paragraphs,
                         para_gap_factor=para_gap_factor,
-                        para_indent_threshold=para_indent_threshold
-                    )
-                    f.write(page_html)
-                    f.flush()  # Ensure data is written to disk
-                
-                # Force garbage collection after each chunk
-                gc.collect()
+                        para_indent_threshold=para_indent_threshold,
+                        skip_graphics_threshold=skip_graphics_threshold
+                )) as page_batches:
+                    _write_pages(f, page_batches)
             
             # Write HTML footer
             f.write('</body>\n</html>')
@@ -399,7 +607,8 @@ class PDFConverter:
         return output_path
     
     def convert_to_text(self, output_path, chunk_size=10, 
-                        preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10):
+                        preserve_paragraphs=False, para_gap_factor=1.5, para_indent_threshold=10,
+                        workers=1, skip_graphics_threshold=0):
         """Convert PDF to plain text
         
         Args:
@@ -408,33 +617,29 @@ class PDFConverter:
             preserve_paragraphs: Whether to preserve paragraph structure
             para_gap_factor: Line spacing threshold factor
             para_indent_threshold: Indentation threshold in pixels
+            workers: Number of processes extracting pages in parallel
+            skip_graphics_threshold: Compressed content stream size in bytes above which pages with little text
+                skip layout analysis (0 disables the check)
         
         Returns:
             Path to the created text file
         """
         # Open document
-        doc = self._open_document()
+        self._open_document()
         total_pages = self.total_pages
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            # Process pages in chunks to control memory usage
-            for i in range(0, total_pages, chunk_size):
-                end = min(i + chunk_size, total_pages)
-                
-                for page_num in tqdm(range(i, end), desc=f"Pages {i+1}-{end}"):
-                    page_text = self._extract_page_text_simple(
-                        page_num, 
+        with _open_output(output_path) as f:
+            with self._page_pool(workers) as pool:
+                # Each page is followed by a page break marker
+                with closing(self._iter_page_texts(
+                        0, total_pages, chunk_size, pool, workers,
                         include_html_tags=False,
                         preserve_paragraphs=preserve_paragraphs,
                         para_gap_factor=para_gap_factor,
-                        para_indent_threshold=para_indent_threshold
-                    )
-                    f.write(page_text)
-                    f.write("\n\n--- Page Break ---\n\n")  # Add page break marker
-                    f.flush()  # Ensure data is written to disk
-                
-                # Force garbage collection after each chunk
-                gc.collect()
+                        para_indent_threshold=para_indent_threshold,
+                        skip_graphics_threshold=skip_graphics_threshold
+                )) as page_batches:
+                    _write_pages(f, page_batches, page_suffix="\n\n--- Page Break ---\n\n")
         
         # Close document
         self._close_document()
@@ -463,6 +668,15 @@ def main():
                         help='Indentation threshold (pixels) for paragraph detection')
     parser.add_argument('--chunk-size', type=int, default=10,
                         help='Number of pages to process at once (memory control)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes extracting pages in parallel (default: 1)')
+    parser.add_argument('--skip-graphics-threshold', type=int, default=0,
+                        help='Compressed content stream size (bytes) above which pages with fewer than '
+                             '100 words skip layout analysis, e.g. 200000 (default: 0, disabled)')
+    parser.add_argument('--compress', action='store_true',
+                        help='Write gzip-compressed .html.gz chunks, readable by the extract scripts '
+                             '(for html-chunks format; html and text output is compressed when '
+                             '--output ends in .gz)')
     
     args = parser.parse_args()
     
@@ -484,7 +698,9 @@ def main():
                 chunk_size=args.chunk_size,
                 preserve_paragraphs=args.preserve_paragraphs,
                 para_gap_factor=args.para_gap_factor,
-                para_indent_threshold=args.para_indent_threshold
+                para_indent_threshold=args.para_indent_threshold,
+                workers=args.workers,
+                skip_graphics_threshold=args.skip_graphics_threshold
             )
             print(f"PDF converted to HTML: {output_file}")
             
@@ -494,7 +710,9 @@ def main():
                 chunk_size=args.chunk_size,
                 preserve_paragraphs=args.preserve_paragraphs,
                 para_gap_factor=args.para_gap_factor,
-                para_indent_threshold=args.para_indent_threshold
+                para_indent_threshold=args.para_indent_threshold,
+                workers=args.workers,
+                skip_graphics_threshold=args.skip_graphics_threshold
             )
             print(f"PDF converted to text: {output_file}")
             
@@ -505,7 +723,10 @@ def main():
                 pages_per_chunk=args.pages_per_chunk,
                 preserve_paragraphs=args.preserve_paragraphs,
                 para_gap_factor=args.para_gap_factor,
-                para_indent_threshold=args.para_indent_threshold
+                para_indent_threshold=args.para_indent_threshold,
+                workers=args.workers,
+                skip_graphics_threshold=args.skip_graphics_threshold,
+                compress=args.compress
             )
             print(f"PDF converted to {len(output_files)} HTML chunks in: {args.chunks_dir}")
     
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("tqdm")
+
+import pdf_convert
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """PDF with enough one-line pages to keep several pool workers busy"""
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for page_num in range(400):
+        doc.new_page().insert_text((72, 72), f"Page {page_num + 1} text.")
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_failing_writer_does_not_hang_pool(sample_pdf, tmp_path, monkeypatch):
+    """An error while writing pages must propagate instead of blocking the pool's shutdown"""
+    def failing_write_pages(f, page_batches, page_suffix=""):
+        for batch_num, _ in enumerate(page_batches):
+            if batch_num == 3:
+                raise OSError("disk full")
+
+    monkeypatch.setattr(pdf_convert, "_write_pages", failing_write_pages)
+    errors = []
+
+    def convert():
+        try:
+            pdf_convert.PDFConverter(sample_pdf).convert_to_text(
+                str(tmp_path / "out.txt"), chunk_size=1, workers=3)
+        except OSError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=convert, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+
+    assert not thread.is_alive(), "conversion hung after the writer failed"
+    assert len(errors) == 1